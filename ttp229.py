@@ -44,6 +44,7 @@ __version__ = "0.0.0+auto.0"
 __repo__ = "https://github.com/dcooperdalrymple/CircuitPython_TTP229.git"
 
 import array
+import sys
 
 from microcontroller import Pin
 from micropython import const
@@ -51,14 +52,34 @@ from micropython import const
 try:
     import adafruit_pioasm
     import rp2pio
+
+    _HAS_PIO = True
 except ImportError:
     import digitalio
 
+    _HAS_PIO = False
+
 try:
-    from typing import Callable
+    from typing import Callable, Iterable
 except ImportError:
     pass
 
+try:
+    from machine import mem32
+except ImportError:
+    mem32 = None
+
+# The SIO register addresses below are only valid on RP2040/RP235x; never touch them on other
+# platforms even if machine.mem32 is importable.
+if sys.platform != "rp2":
+    mem32 = None
+
+# RP2 SIO registers for atomic GPIO access, used by the bit-bang fallback when machine.mem32 is
+# available. See RP2040 datasheet section 2.3.1.7.
+_SIO_GPIO_IN = const(0xD0000004)
+_SIO_GPIO_OUT_SET = const(0xD0000014)
+_SIO_GPIO_OUT_CLR = const(0xD0000018)
+
 
 class Mode:
     """Enum-like class representing the possible modes of the TTP229."""
@@ -70,6 +91,67 @@ class Mode:
     """16-keys mode"""
 
 
+_BITS = tuple(1 << i for i in range(16))
+
+# PIO timing constants: extra cycles SCL is held active before sampling, and the nested Tout
+# delay loop counters (4 iterations of 32 x 32 cycles = ~2ms at 2MHz).
+_CLK_SETUP = const(1)
+_TOUT_Y = const(3)
+_TOUT_X = const(31)
+_TOUT_DELAY = const(31)
+
+_PIO_CACHE = {}
+
+
+def _pio_program(invert_clk: bool, count: int):
+    """Assemble the PIO program for the given clock polarity and key count, caching the result so
+    repeated construction does not re-parse the source and the source string can be collected."""
+    key = (invert_clk, count)
+    program = _PIO_CACHE.get(key)
+    if program is None:
+        clk_off = 1 if invert_clk else 0
+        clk_on = 0 if invert_clk else 1
+        clk_cnt = count - 1
+        source = f"""
+.program read_ttp
+    set pins, {clk_off}
+.wrap_target
+    set y, {_TOUT_Y}
+tout_y:
+    set x, {_TOUT_X}
+tout_x:
+    nop [{_TOUT_DELAY}]
+    jmp x-- tout_x
+    jmp y-- tout_y
+    set x, {clk_cnt}
+bitloop:
+    set pins, {clk_on} [{_CLK_SETUP}]
+    in pins, 1
+    set pins, {clk_off}
+    jmp x-- bitloop
+    push
+.wrap
+"""
+        program = adafruit_pioasm.assemble(source)
+        _PIO_CACHE[key] = program
+    return program
+
+
+def _bitbang_read(sdo, scl, count: int, invert: bool) -> int:
+    # Clock out one full word and sample the data line on each falling (or rising, if inverted)
+    # edge. Module scope keeps all per-bit state in fast locals instead of attribute lookups.
+    data = 0
+    bits = _BITS
+    scl.value = invert
+    for i in range(count):
+        scl.value = not invert
+        if sdo.value:
+            data |= bits[i]
+        scl.value = invert
+    scl.value = not invert
+    return data
+
+
 class TTP229:
     """Driver for the TTP229-BSF serial interface capacitive touch sensor. The states of each touch
     input can be accessed after calling :func:`update` using the :attr:`data` value, the
@@ -89,11 +171,21 @@ class TTP229:
     :param scl: Serial clock pin
     :param mode: Key mode using a constant of the :class:`Mode` enum
     :param invert_clk: If using an active-low clock, set this parameter to `True`
+    :param auto_read: If set to `True` on ports where :class:`rp2pio.StateMachine` supports
+        background reads, samples are copied out of the state machine by DMA continuously and
+        :func:`update` only inspects the latest sample instead of draining the RX FIFO. Ignored
+        when unsupported.
     """
 
+    # Pre-allocated at import time so the usual single-keypad setup never allocates its read
+    # buffer from a potentially fragmented heap. Additional instances get their own buffer.
+    _scratch = array.array("H", [0])
+    _instances = 0
+
     on_press: Callable[[int], None] = None
     """Callback which will be called when a press is detected during the :func:`update` method.
-    The callback must include 1 integer parameter for the index of the touch input.
+    Must be a callable with 1 integer parameter for the index of the touch input, or `None` to
+    disable.
 
     .. code-block:: python
 
@@ -107,7 +199,8 @@ class TTP229:
 
     on_release: Callable[[int], None] = None
     """Callback which will be called when a release is detected during the :func:`update` method.
-    The callback must include 1 integer parameter for the index of the touch input.
+    Must be a callable with 1 integer parameter for the index of the touch input, or `None` to
+    disable.
 
     .. code-block:: python
 
@@ -119,39 +212,30 @@ class TTP229:
         ttp.on_release = released
     """
 
-    def __init__(self, sdo: Pin, scl: Pin, mode: int = Mode.KEY_16, invert_clk: bool = False):
-        self._data = array.array("H", [0, 0])
+    def __init__(  # noqa: PLR0913
+        self,
+        sdo: Pin,
+        scl: Pin,
+        mode: int = Mode.KEY_16,
+        invert_clk: bool = False,
+        auto_read: bool = False,
+    ):
+        self._curr = 0
+        self._prev = 0
+        self._changed = 0
+        self._pressed = 0
+        self._released = 0
         self._mode = mode
         self._count = (mode + 1) * 8
+        self._mask = self._count - 1  # count is always a power of two (8 or 16)
         self._index = 0
         self._invert_clk = invert_clk
 
-        if "rp2pio" in globals():
+        if _HAS_PIO:
+            self._update = self._update_pio
             clk_off = 1 if invert_clk else 0
-            clk_on = 0 if invert_clk else 0
-            clk_cnt = self._count - 1
-            pioasm = f"""
-.program read_ttp
-    set pins, {clk_off}
-.wrap_target
-    set y, 3
-tout_y:
-    set x, 31
-tout_x:
-    nop [31]
-    jmp x-- tout_x
-    jmp y-- tout_y
-    set x, {clk_cnt}
-bitloop:
-    set pins, {clk_on} [3]
-    set pins, {clk_off} [1]
-    in pins, 1
-    jmp x-- bitloop
-    push
-.wrap
-"""
             self._piosm = rp2pio.StateMachine(
-                adafruit_pioasm.assemble(pioasm),
+                _pio_program(invert_clk, self._count),
                 frequency=2000000,  # 2MHz, cycle = 0.5us
                 first_in_pin=sdo,
                 in_pin_count=1,
@@ -161,13 +245,22 @@ bitloop:
                 initial_set_pin_state=clk_off,
                 initial_set_pin_direction=1,
             )
+            self._sm = self._piosm
+            self._readinto = self._piosm.readinto
+            self._buf = TTP229._scratch if TTP229._instances == 0 else array.array("H", [0])
+            if auto_read and hasattr(self._piosm, "background_read"):
+                # DMA continuously overwrites the buffer with the freshest sample, so update()
+                # never has to touch the RX FIFO from Python.
+                self._piosm.background_read(loop=self._buf)
+                self._update = self._update_auto
             # Timing Details:
-            # Clock Cycle (F_SCL) = 8 pio cycles = 4us = 250KHz
-            # Word Cycle = 64us = ~15.6KHz
+            # Clock Cycle (F_SCL) = 5 pio cycles = 2.5us = 400KHz (datasheet max is 512KHz)
+            # Word Cycle = 40us = 25KHz
             # Delay (Tout) = 2ms
-            # Frequency (T_resp) = 2064us = ~484.5Hz
+            # Frequency (T_resp) = 2040us = ~490Hz
 
         else:
+            self._update = self._update_bitbang
             self._sdo = digitalio.DigitalInOut(sdo)
             self._sdo.direction = digitalio.Direction.INPUT
             self._sdo.pull = digitalio.Pull.UP
@@ -175,40 +268,138 @@ bitloop:
             self._scl = digitalio.DigitalInOut(scl)
             self._scl.direction = digitalio.Direction.OUTPUT
 
-    def update(self) -> bool:
-        """Update the touch input state."""
-        if "rp2pio" in globals():
-            if self._piosm.in_waiting <= 0:
-                return False
-            self._piosm.readinto(self._data, end=1)
+            if mem32 is not None:
+                # RP2 board without PIO support: toggle SCL through the SIO atomic set/clear
+                # registers instead of the DigitalInOut value property. The DigitalInOut objects
+                # are kept alive so the pins stay configured.
+                sdo_id = getattr(sdo, "id", None)
+                scl_id = getattr(scl, "id", None)
+                if isinstance(sdo_id, int) and isinstance(scl_id, int):
+                    self._sdo_id = sdo_id
+                    self._scl_mask = 1 << scl_id
+                    self._update = self._update_sio
+
+        TTP229._instances += 1
+
+    def _update_pio(self) -> bool:
+        # Drain the RX FIFO so that the most recent sample drives edge detection rather than the
+        # oldest queued word. Intermediate samples are discarded.
+        count = self._sm.in_waiting
+        if count <= 0:
+            return False
+        readinto = self._readinto
+        buf = self._buf
+        for _ in range(count):
+            readinto(buf, end=1)
+        self._curr = buf[0]
+        return True
+
+    def _update_auto(self) -> bool:
+        self._curr = self._buf[0]
+        return True
+
+    def _update_bitbang(self) -> bool:
+        self._curr = _bitbang_read(self._sdo, self._scl, self._count, self._invert_clk)
+        return True
+
+    def _update_sio(self) -> bool:
+        sdo_id = self._sdo_id
+        scl_mask = self._scl_mask
+        if self._invert_clk:
+            on_reg, off_reg = _SIO_GPIO_OUT_CLR, _SIO_GPIO_OUT_SET
         else:
-            self._data[0] = 0
-            self._scl.value = self._invert_clk
-            for i in range(self._count):
-                self._scl.value = not self._invert_clk
-                if self._sdo.value:
-                    self._data[0] |= 1 << i
-                self._scl.value = self._invert_clk
-            self._scl.value = not self._invert_clk
-
-        for i in range(self._count):
-            value = self._data[0] & (1 << i)
-            if value != self._data[1] & (1 << i):
-                if value and callable(self.on_press):
-                    self.on_press(i)
-                elif not value and callable(self.on_release):
-                    self.on_release(i)
-        self._data[1] = self._data[0]
+            on_reg, off_reg = _SIO_GPIO_OUT_SET, _SIO_GPIO_OUT_CLR
+        data = 0
+        bits = _BITS
+        count = self._count
+        mem32[off_reg] = scl_mask
+        for i in range(count):
+            mem32[on_reg] = scl_mask
+            if (mem32[_SIO_GPIO_IN] >> sdo_id) & 1:
+                data |= bits[i]
+            mem32[off_reg] = scl_mask
+        mem32[on_reg] = scl_mask
+        self._curr = data
+        return True
 
+    def update(self) -> bool:
+        """Update the touch input state."""
+        if not self._update():
+            return False
+        self._process()
         return True
 
+    @classmethod
+    def update_all(cls, ttps: Iterable["TTP229"]) -> bool:
+        """Update the touch input state of multiple :class:`TTP229` instances in a single pass,
+        running each instance's callbacks as usual. Returns `True` if any instance read a new
+        sample.
+
+        :param ttps: Instances to update
+        """
+        updated = False
+        for ttp in ttps:
+            if ttp._update():
+                ttp._process()
+                updated = True
+        return updated
+
+    def _process(self) -> None:
+        curr = self._curr
+        prev = self._prev
+        changed = curr ^ prev
+        self._changed = changed
+        self._pressed = changed & curr
+        self._released = changed & prev
+        on_press = self.on_press
+        on_release = self.on_release
+        if changed == 0 or (on_press is None and on_release is None):
+            self._prev = curr
+            return
+        # Walk shifted copies so the loop ends at the highest changed bit; int.bit_length() is
+        # unavailable on CircuitPython so the index is tracked manually.
+        state = curr
+        i = 0
+        while changed:
+            if changed & 1:
+                if state & 1:
+                    if on_press is not None:
+                        on_press(i)
+                elif on_release is not None:
+                    on_release(i)
+            changed >>= 1
+            state >>= 1
+            i += 1
+        self._prev = curr
+
     @property
     def data(self) -> int:
-        """Return an integer with the state of each touch pad in binary-indexed format."""
-        return self._data[0]
+        """Return an integer with the state of each touch pad in binary-indexed format. This is
+        the plain integer sample from the most recent call to :func:`update`; reading it does not
+        touch the hardware or any buffer."""
+        return self._curr
+
+    @property
+    def changed(self) -> int:
+        """Bitmask of the touch inputs whose state changed during the last call to :func:`update`.
+        Useful to gate expensive work without iterating every input, ie:
+        ``if ttp.changed: redraw()``."""
+        return self._changed
+
+    @property
+    def pressed_mask(self) -> int:
+        """Bitmask of the touch inputs which became pressed during the last call to
+        :func:`update`."""
+        return self._pressed
+
+    @property
+    def released_mask(self) -> int:
+        """Bitmask of the touch inputs which became released during the last call to
+        :func:`update`."""
+        return self._released
 
     def __getitem__(self, index: int) -> bool:
-        return bool(self._data[0] & (1 << (index % self._count)))
+        return bool(self._curr & _BITS[index & self._mask])
 
     def __len__(self):
         return self._count